@@ -10,12 +10,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-@dataclass(slots=True)
+@dataclass(frozen=True, slots=True)
 class Settings:
     telegram_bot_token: str
     trello_api_key: str
     trello_api_token: str
     trello_default_list_name: str = "Inbox"
+    trello_max_attachment_mb: int = 10
 
 
 class SettingsError(RuntimeError):
@@ -34,6 +35,7 @@ def load_settings() -> Settings:
     trello_key = _read_env("TRELLO_API_KEY")
     trello_token = _read_env("TRELLO_API_TOKEN")
     default_list_name = _read_env("TRELLO_DEFAULT_LIST_NAME") or "Inbox"
+    max_attachment_mb = _read_env("TRELLO_MAX_ATTACHMENT_MB") or "10"
 
     missing = [
         name
@@ -50,9 +52,15 @@ def load_settings() -> Settings:
             "Missing required environment variables: " + ", ".join(missing)
         )
 
+    if not max_attachment_mb.isdecimal() or int(max_attachment_mb) <= 0:
+        raise SettingsError(
+            "TRELLO_MAX_ATTACHMENT_MB must be a positive whole number of megabytes"
+        )
+
     return Settings(
         telegram_bot_token=telegram_token,
         trello_api_key=trello_key,
         trello_api_token=trello_token,
         trello_default_list_name=default_list_name,
+        trello_max_attachment_mb=int(max_attachment_mb),
     )
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from textwrap import dedent
-from typing import Optional
+from typing import Any, Awaitable, Dict, Optional
 
-from telegram import File, Update
+from telegram import PhotoSize, Update, Voice
 from telegram.ext import (
     Application,
+    BaseUpdateProcessor,
     CommandHandler,
     ContextTypes,
     MessageHandler,
@@ -27,36 +29,117 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# Upper bound on the number of update handlers running at the same time
+# (updates from the same user still run one after another). Their Trello
+# calls share TrelloClient's single requests.Session from worker threads;
+# that is safe here because the session is configured once at startup and
+# only issues requests afterwards, and its urllib3 connection pool (sized to
+# match) is thread-safe.
+CONCURRENT_UPDATES = 16
+TOO_LARGE_REPLY = "حجم فایل بیشتر از {limit} مگابایت است و نمی‌توانم آن را در Trello ذخیره کنم."
+
+START_INTRO = dedent(
+    """
+    سلام {name} 👋
+
+    برایت یک برد خصوصی در Trello ساختم تا پیام‌هایت را به تسک تبدیل کنم.
+    از این به بعد هر پیام متنی، عکس یا ویسی که بفرستی را به عنوان تسک جدید در لیست Inbox همان برد ذخیره می‌کنم.
+    می‌توانی پیام را با این ساختار بفرستی تا توضیحات بیشتری به کارت اضافه شود:
+
+    عنوان تسک
+    ---
+    توضیحات تکمیلی
+
+    اگر فقط یک خط بفرستی همان خط عنوان خواهد شد.
+    برای مشاهده کارت‌ها وارد Trello شو و برد «{board_name}» را باز کن.
+    """
+).strip()
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently, but one at a time for each user.
+
+    Each message becomes a card in the order the user sent it, while different
+    users are still served in parallel. Updates without a user run unordered.
+    """
+
+    def __init__(self, max_concurrent_updates: int) -> None:
+        super().__init__(max_concurrent_updates)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        user = update.effective_user if isinstance(update, Update) else None
+        if user is None:
+            await coroutine
+            return
+        user_id = user.id
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        try:
+            async with lock:
+                await coroutine
+        finally:
+            # Drop the lock once nobody is queued on it so the table does not
+            # grow with every user the bot has ever seen.
+            self._pending[user_id] -= 1
+            if not self._pending[user_id]:
+                del self._pending[user_id]
+                del self._locks[user_id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
 
 class BotHandlers:
-    def __init__(self, workspace_manager: WorkspaceManager, trello: TrelloClient) -> None:
+    def __init__(
+        self,
+        workspace_manager: WorkspaceManager,
+        trello: TrelloClient,
+        *,
+        max_attachment_mb: int,
+    ) -> None:
         self._workspace_manager = workspace_manager
         self._trello = trello
+        # Files above the Trello plan's attachment limit are rejected before
+        # they are downloaded from Telegram at all.
+        self._max_attachment_bytes = max_attachment_mb * 1024 * 1024
+        self._too_large_reply = TOO_LARGE_REPLY.format(limit=max_attachment_mb)
+
+    def _too_large(self, file_size: Optional[int]) -> bool:
+        return file_size is not None and file_size > self._max_attachment_bytes
+
+    async def _ensure_workspace(self, user_id: int) -> Workspace:
+        workspace = self._workspace_manager.cached_workspace(user_id)
+        if workspace is not None:
+            return workspace
+        # On a miss, Trello and the workspace file are blocking I/O; keep them
+        # off the event loop so other updates are not stalled behind them.
+        return await asyncio.to_thread(
+            self._workspace_manager.ensure_workspace, user_id
+        )
 
-    def _ensure_workspace(self, user_id: int) -> Workspace:
-        return self._workspace_manager.ensure_workspace(user_id)
+    def _create_card_with_attachment(
+        self, list_id: str, *, name: str, desc: str | None, file_path: Path
+    ) -> Dict[str, Any]:
+        card = self._trello.create_card(list_id, name=name, desc=desc)
+        self._trello.attach_file(card["id"], file_path, file_path.name)
+        return card
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user = update.effective_user
         if not user:
             return
-        workspace = self._ensure_workspace(user.id)
-        intro = dedent(
-            f"""
-            سلام {user.first_name or user.username or "دوست عزیز"} 👋
-
-            برایت یک برد خصوصی در Trello ساختم تا پیام‌هایت را به تسک تبدیل کنم.
-            از این به بعد هر پیام متنی، عکس یا ویسی که بفرستی را به عنوان تسک جدید در لیست Inbox همان برد ذخیره می‌کنم.
-            می‌توانی پیام را با این ساختار بفرستی تا توضیحات بیشتری به کارت اضافه شود:
-
-            عنوان تسک
-            ---
-            توضیحات تکمیلی
-
-            اگر فقط یک خط بفرستی همان خط عنوان خواهد شد.
-            برای مشاهده کارت‌ها وارد Trello شو و برد «{workspace.board_name}» را باز کن.
-            """
-        ).strip()
+        workspace = await self._ensure_workspace(user.id)
+        intro = START_INTRO.format(
+            name=user.first_name or user.username or "دوست عزیز",
+            board_name=workspace.board_name,
+        )
         await update.message.reply_text(intro)
 
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -68,11 +151,14 @@ class BotHandlers:
         if not text.strip():
             await message.reply_text("پیام متنی خالی بود و به کارت تبدیل نشد.")
             return
-        workspace = self._ensure_workspace(user.id)
+        workspace = await self._ensure_workspace(user.id)
         card_name, card_description = _split_card_content(text)
         try:
-            card = self._trello.create_card(
-                workspace.inbox_list_id, name=card_name, desc=card_description
+            card = await asyncio.to_thread(
+                self._trello.create_card,
+                workspace.inbox_list_id,
+                name=card_name,
+                desc=card_description,
             )
         except TrelloError:
             LOGGER.exception("Could not create card for text message")
@@ -90,21 +176,24 @@ class BotHandlers:
         if not message or not user or not message.photo:
             return
         photo = message.photo[-1]
-        telegram_file = await photo.get_file()
-        temp_path = await _download_temp(telegram_file, suffix=".jpg")
+        if self._too_large(photo.file_size):
+            await message.reply_text(self._too_large_reply)
+            return
+        temp_path = await _download_temp(photo, suffix=".jpg")
         if temp_path is None:
             await message.reply_text("دریافت فایل از تلگرام ناموفق بود.")
             return
-        workspace = self._ensure_workspace(user.id)
         card_title = message.caption or "عکس جدید"
         card_name, card_description = _split_card_content(card_title)
         try:
-            card = self._trello.create_card(
+            workspace = await self._ensure_workspace(user.id)
+            card = await asyncio.to_thread(
+                self._create_card_with_attachment,
                 workspace.inbox_list_id,
                 name=f"📸 {card_name}",
                 desc=card_description,
+                file_path=temp_path,
             )
-            self._trello.attach_file(card["id"], temp_path, temp_path.name)
         except TrelloError:
             LOGGER.exception("Could not create card for photo")
             await message.reply_text(
@@ -123,22 +212,23 @@ class BotHandlers:
         user = update.effective_user
         if not message or not user or not message.voice:
             return
-        telegram_file = await message.voice.get_file()
-        temp_path = await _download_temp(telegram_file, suffix=".ogg")
+        if self._too_large(message.voice.file_size):
+            await message.reply_text(self._too_large_reply)
+            return
+        temp_path = await _download_temp(message.voice, suffix=".ogg")
         if temp_path is None:
             await message.reply_text("نتوانستم فایل ویس را دریافت کنم.")
             return
-        workspace = self._ensure_workspace(user.id)
         title = message.caption or "ویس جدید"
         card_name, card_description = _split_card_content(title)
         try:
-            card = self._trello.create_card(
+            workspace = await self._ensure_workspace(user.id)
+            card = await asyncio.to_thread(
+                self._create_card_with_attachment,
                 workspace.inbox_list_id,
                 name=f"🎤 {card_name}",
                 desc=card_description or "فایل صوتی پیوست شده است.",
-            )
-            self._trello.attach_file(
-                card["id"], temp_path, temp_path.name
+                file_path=temp_path,
             )
         except TrelloError:
             LOGGER.exception("Could not create card for voice message")
@@ -154,7 +244,8 @@ class BotHandlers:
         )
 
 
-async def _download_temp(file: File, suffix: str = "") -> Optional[Path]:
+async def _download_temp(media: PhotoSize | Voice, suffix: str = "") -> Optional[Path]:
+    file = await media.get_file()
     if not file:
         return None
     with NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
@@ -163,11 +254,11 @@ async def _download_temp(file: File, suffix: str = "") -> Optional[Path]:
 
 
 def _split_card_content(text: str) -> tuple[str, Optional[str]]:
-    cleaned = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    cleaned = [stripped for line in text.splitlines() if (stripped := line.strip())]
     if not cleaned:
         return "پیام بدون متن", None
     title = cleaned[0][:256]
-    description = "\n".join(cleaned[1:]).strip()
+    description = "\n".join(cleaned[1:])
     return title, description or None
 
 
@@ -182,9 +273,24 @@ def build_application() -> Application:
     workspace_manager = WorkspaceManager(
         storage, trello, default_list_name=settings.trello_default_list_name
     )
-    handlers = BotHandlers(workspace_manager, trello)
+    handlers = BotHandlers(
+        workspace_manager,
+        trello,
+        max_attachment_mb=settings.trello_max_attachment_mb,
+    )
+
+    async def close_trello(_: Application) -> None:
+        trello.close()
 
-    application = Application.builder().token(settings.telegram_bot_token).build()
+    application = (
+        Application.builder()
+        .token(settings.telegram_bot_token)
+        # Handle different users' updates concurrently so one user's slow
+        # Trello upload does not hold up everyone else's messages.
+        .concurrent_updates(PerUserUpdateProcessor(CONCURRENT_UPDATES))
+        .post_shutdown(close_trello)
+        .build()
+    )
 
     application.add_handler(CommandHandler("start", handlers.start))
     application.add_handler(MessageHandler(filters.PHOTO, handlers.handle_photo))
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any, Dict
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
 LOGGER = logging.getLogger(__name__)
@@ -16,25 +17,54 @@ class TrelloError(RuntimeError):
 
 class TrelloClient:
     base_url = "https://api.trello.com/1"
+    pool_connections = 4
+    pool_maxsize = 16
+    # (connect, read) in seconds: fail fast on a stuck handshake while still
+    # giving slow responses and uploads enough time to finish.
+    timeout = (3.05, 15)
+    upload_timeout = (3.05, 60)
 
     def __init__(self, api_key: str, api_token: str) -> None:
         self.auth = {"key": api_key, "token": api_token}
+        # One long-lived session keeps TLS connections to Trello alive between
+        # messages instead of paying a fresh handshake for every card.
+        self._session = requests.Session()
+        # Credentials are merged into every request's query string by the
+        # session itself, so they are not re-copied into each params dict.
+        self._session.params = dict(self.auth)
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+            ),
+        )
+
+    def close(self) -> None:
+        self._session.close()
 
     def _request(self, method: str, path: str, **kwargs: Any) -> Any:
         url = f"{self.base_url}{path}"
         params = kwargs.pop("params", {})
         if "auth" in kwargs:
             raise ValueError("auth parameter is reserved")
-        params.update(self.auth)
-        response = requests.request(method, url, params=params, **kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self._session.request(method, url, params=params, **kwargs)
+        except requests.RequestException as exc:
+            # The exception text embeds the query string, which carries the
+            # API token, so only the exception type is reported and the
+            # original exception is not chained into logged tracebacks.
+            reason = type(exc).__name__
+            LOGGER.error("Trello request to %s failed: %s", url, reason)
+            raise TrelloError(reason) from None
         if response.ok:
             if response.content:
                 return response.json()
             return None
-        LOGGER.error(
-            "Trello API error %s on %s: %s", response.status_code, url, response.text
-        )
-        raise TrelloError(response.text)
+        detail = response.text
+        LOGGER.error("Trello API error %s on %s: %s", response.status_code, url, detail)
+        raise TrelloError(detail)
 
     def create_board(self, name: str) -> Dict[str, Any]:
         return self._request(
@@ -76,4 +106,5 @@ class TrelloClient:
                 "POST",
                 f"/cards/{card_id}/attachments",
                 files={"file": (file_name, fh)},
+                timeout=self.upload_timeout,
             )
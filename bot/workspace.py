@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
+from typing import Dict, Optional
 
 from .storage import WorkspaceStorage
 from .trello_client import TrelloClient
 
 
-@dataclass(slots=True)
+@dataclass(frozen=True, slots=True)
 class Workspace:
     board_id: str
     board_name: str
@@ -18,17 +20,46 @@ class WorkspaceManager:
         self._storage = storage
         self._trello = trello
         self._default_list_name = default_list_name
+        # The mapping file is only written by this process, so it is read once
+        # and kept in memory instead of being re-parsed on every message.
+        self._data: Optional[Dict[str, Dict[str, str]]] = None
+        self._workspaces: Dict[int, Workspace] = {}
+        # Updates are handled concurrently; the lock keeps two messages from a
+        # new user from creating two boards or racing on the mapping file.
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        if self._data is None:
+            self._data = self._storage.load()
+        return self._data
+
+    def cached_workspace(self, user_id: int) -> Optional[Workspace]:
+        """Return the user's workspace if already resolved, without any I/O."""
+        return self._workspaces.get(user_id)
 
     def ensure_workspace(self, user_id: int) -> Workspace:
-        data = self._storage.load()
+        workspace = self.cached_workspace(user_id)
+        if workspace is not None:
+            return workspace
+        with self._lock:
+            return self._resolve_workspace(user_id)
+
+    def _resolve_workspace(self, user_id: int) -> Workspace:
+        workspace = self._workspaces.get(user_id)
+        if workspace is not None:
+            return workspace
+
+        data = self._load()
         key = str(user_id)
         if key in data:
             user_data = data[key]
-            return Workspace(
+            workspace = Workspace(
                 board_id=user_data["board_id"],
                 board_name=user_data.get("board_name", "TaskMate Workspace"),
                 inbox_list_id=user_data["inbox_list_id"],
             )
+            self._workspaces[user_id] = workspace
+            return workspace
 
         board_name = f"TaskMate Telegram Workspace #{user_id}"
         board = self._trello.create_board(board_name)
@@ -40,8 +71,10 @@ class WorkspaceManager:
         }
         self._storage.save(data)
 
-        return Workspace(
+        workspace = Workspace(
             board_id=board["id"],
             board_name=board.get("name", board_name),
             inbox_list_id=inbox_list["id"],
         )
+        self._workspaces[user_id] = workspace
+        return workspace